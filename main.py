@@ -5,23 +5,37 @@ Supports real-time back-and-forth conversation on phone calls
 """
 
 import os
+import re
+import asyncio
+import gzip
 import logging
-import json
-from datetime import datetime
-from typing import Dict, Any
+import time
+import uuid
+from urllib.parse import parse_qsl
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional
 
-from fastapi import FastAPI, Request, Response, HTTPException
+from fastapi import FastAPI, Request, Response, HTTPException, BackgroundTasks
+from fastapi.responses import ORJSONResponse
 from twilio.twiml.voice_response import VoiceResponse
-from openai import OpenAI
+from xml.sax.saxutils import escape
+from openai import AsyncOpenAI
 from google.cloud import storage
+import google.auth
+from google.auth.transport.requests import Request as AuthRequest
 import aiohttp
+import httpx
+import orjson
+import redis.asyncio as redis
+from redis.exceptions import WatchError
 
 # Initialize FastAPI
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Configure logging
 tlogging = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
+# Set LOG_LEVEL=WARNING in production to skip the per-turn INFO lines entirely
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
 
 # Configuration
 BASE_URL = os.environ.get(
@@ -31,13 +45,27 @@ PROJECT_ID = os.environ.get(
     "GOOGLE_CLOUD_PROJECT", "voice-ai-project-461900"
 )
 BUCKET_NAME = os.environ.get("GCS_BUCKET", "voice-agent-ai")
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
 
 # Initialize OpenAI
 openai_api_key = os.environ.get("OPENAI_API_KEY")
 if not openai_api_key:
     tlogging.error("OPENAI_API_KEY environment variable is not set")
     raise RuntimeError("OPENAI_API_KEY environment variable is not set")
-oai = OpenAI(api_key=openai_api_key)
+# One pooled HTTP/2 client shared by chat, TTS and Whisper calls, sized for concurrent callers
+oai = AsyncOpenAI(
+    api_key=openai_api_key,
+    http_client=httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        http2=True,
+        timeout=httpx.Timeout(10.0, connect=2.0)
+    ),
+    max_retries=1
+)
+# Calls a waiting caller depends on fail fast instead of retrying past Twilio's 15s webhook window
+oai_realtime = oai.with_options(max_retries=0)
+# Whisper runs as long as the recording, so it gets more than the 10s read timeout
+oai_transcribe = oai.with_options(timeout=httpx.Timeout(60.0, connect=2.0), max_retries=0)
 
 # Voice AI Agent System Prompt
 AGENT_SYSTEM_PROMPT = """You are a helpful voice AI assistant having a natural phone conversation. 
@@ -46,6 +74,16 @@ Keep responses under 80 words and sound natural for speech.
 Don't always ask questions - sometimes just respond and let the conversation flow naturally.
 Be friendly and helpful. Avoid sounding like a Q&A session or robotic assistant."""
 
+# Long calls only send recent exchanges to GPT; older ones are folded into a running summary
+CONTEXT_EXCHANGES = 6
+MAX_CONTEXT_EXCHANGES = 10
+SUMMARY_LOCK_TTL = 60  # seconds; outlasts the summary GPT call so a crashed run can't block later ones
+SUMMARY_PROMPT = """Summarize this phone conversation between a caller and an AI assistant in a few sentences.
+Keep names, facts, requests and anything the assistant promised. If a previous summary is given, extend it."""
+
+# Replies that end the call (checked on every turn, so keep it a set lookup)
+END_PHRASES = frozenset({"no", "nope", "nothing", "bye", "goodbye", "that's all", "no thanks"})
+
 # Twilio credentials
 TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.environ.get("TWILIO_AUTH_TOKEN")
@@ -56,67 +94,630 @@ if not (TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN):
 # Initialize GCS client
 storage_client = storage.Client(project=PROJECT_ID)
 bucket = storage_client.bucket(BUCKET_NAME)
+# Cloud Run credentials carry no private key, so URLs are signed through the IAM signBlob API
+signing_credentials, _ = google.auth.default()
 
-# Global conversation storage
-conversations = {}
+async def upload_to_gcs(path: str, data, content_type: str, content_encoding: Optional[str] = None):
+    """Upload to GCS in a worker thread so the sync client never blocks the event loop"""
+    blob = bucket.blob(path)
+    blob.content_encoding = content_encoding
+    await asyncio.to_thread(blob.upload_from_string, data, content_type=content_type)
+    return blob
 
-def add_to_conversation(call_sid: str, user_message: str, ai_response: str):
-    """Add exchange to ongoing conversation in memory"""
-    if call_sid not in conversations:
-        conversations[call_sid] = {
-            "call_sid": call_sid,
-            "start_time": datetime.utcnow().isoformat(),
-            "exchanges": []
-        }
-    
-    conversations[call_sid]["exchanges"].append({
-        "timestamp": datetime.utcnow().isoformat(),
+# Conversation state lives in Redis so any instance can serve any turn of a call
+redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+CONVERSATION_TTL = 3600  # seconds; abandoned calls expire instead of leaking memory
+
+def conversation_key(call_sid: str) -> str:
+    """Redis list of JSON-encoded exchanges for a call"""
+    return f"conv:{call_sid}"
+
+def conversation_meta_key(call_sid: str) -> str:
+    """Redis hash with per-call metadata (start time, running summary)"""
+    return f"conv:{call_sid}:meta"
+
+def conversation_messages_key(call_sid: str) -> str:
+    """Redis list of ready-to-send chat messages not yet covered by the call's summary"""
+    return f"conv:{call_sid}:messages"
+
+def summary_lock_key(call_sid: str) -> str:
+    """Redis lock held while a call's older exchanges are being summarized"""
+    return f"conv:{call_sid}:summarizing"
+
+def reply_in_flight_key(call_sid: str) -> str:
+    """Redis flag set while a streamed reply has not been added to the conversation yet"""
+    return f"conv:{call_sid}:replying"
+
+# Bounds how long the final store waits on a reply whose pipeline died without clearing its flag
+REPLY_IN_FLIGHT_TTL = 60
+
+def segments_key(call_sid: str, reply_id: str) -> str:
+    """Redis list of ready reply segments for one streamed AI reply"""
+    return f"tts:{call_sid}:{reply_id}"
+
+# Text-to-speech for streamed replies (played back via <Play>)
+TTS_MODEL = "tts-1"
+TTS_VOICE = os.environ.get("TTS_VOICE", "nova")
+TTS_URL_EXPIRY = timedelta(minutes=15)
+SEGMENT_WAIT_SECONDS = 10
+SEGMENT_TTL = 300
+
+# Split streamed GPT output into sentences so each can be spoken as soon as it is complete
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# The opening segment may also break at a clause, so a long first sentence doesn't delay first audio
+CLAUSE_END = re.compile(r"(?<=[,;:])\s+")
+FIRST_SEGMENT_MIN_CHARS = 40
+
+# Replies started early from Twilio partial results, keyed by call SID.
+# Held per process - if the final result lands on another worker it simply starts cold,
+# and entries are evicted after SPECULATION_TTL_SECONDS since that worker never sees the call end.
+speculations: Dict[str, dict] = {}
+SPECULATION_MIN_WORDS = 3
+SPECULATION_TTL_SECONDS = 60
+# Partials arrive several times a second; a growing transcript restarts the speculation at most once
+# per window, from the newest partial when the window closes
+SPECULATION_DEBOUNCE_SECONDS = 0.75
+
+# Keep references to fire-and-forget tasks so they aren't garbage collected mid-flight
+background_tasks = set()
+
+def spawn(coro) -> asyncio.Task:
+    """Run a coroutine in the background without awaiting it"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+def iso_timestamp(ts) -> Optional[str]:
+    """Format epoch seconds as an ISO 8601 UTC string for stored transcripts"""
+    return datetime.fromtimestamp(float(ts), timezone.utc).isoformat() if ts is not None else None
+
+async def add_to_conversation(call_sid: str, user_message: str, ai_response: str):
+    """Add exchange to ongoing conversation in Redis"""
+    key = conversation_key(call_sid)
+    meta_key = conversation_meta_key(call_sid)
+    messages_key = conversation_messages_key(call_sid)
+    # Keep raw epoch seconds while the call is live; they're formatted once in store_final_conversation
+    now = time.time()
+    exchange = orjson.dumps({
+        "timestamp": now,
         "user": user_message,
         "ai": ai_response
     })
     
-    tlogging.info(f"Added exchange to {call_sid} - total exchanges: {len(conversations[call_sid]['exchanges'])}")
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hsetnx(meta_key, "start_time", now)
+        pipe.rpush(key, exchange)
+        # Append this turn to the prompt history instead of rebuilding it from exchanges every turn
+        pipe.rpush(
+            messages_key,
+            orjson.dumps({"role": "user", "content": user_message}),
+            orjson.dumps({"role": "assistant", "content": ai_response})
+        )
+        pipe.ltrim(messages_key, -2 * MAX_CONTEXT_EXCHANGES, -1)
+        for ttl_key in (key, meta_key, messages_key):
+            pipe.expire(ttl_key, CONVERSATION_TTL)
+        _, total, *_ = await pipe.execute()
+    
+    tlogging.info("Added exchange to %s - total exchanges: %s", call_sid, total)
+    return total
 
-def store_final_conversation(call_sid: str, audio_url: str = None):
+async def get_context(call_sid: str):
+    """
+    Load the running summary plus the chat messages not yet folded into it.
+    The message list is capped at MAX_CONTEXT_EXCHANGES turns, so prompt size stays flat however long the call runs.
+    """
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hget(conversation_meta_key(call_sid), "summary")
+        pipe.lrange(conversation_messages_key(call_sid), 0, -1)
+        summary, raw_messages = await pipe.execute()
+    return summary, [orjson.loads(message) for message in raw_messages]
+
+async def summarize_older_exchanges(call_sid: str):
+    """
+    Fold all but the last CONTEXT_EXCHANGES exchanges into the call's running summary.
+    Runs once more than MAX_CONTEXT_EXCHANGES have piled up, so it costs one small GPT call every few turns.
+    """
+    lock_key = summary_lock_key(call_sid)
+    locked = False
+    try:
+        # Spawned on every turn past the threshold - only one run per call may summarize at a time
+        locked = await redis_client.set(lock_key, 1, nx=True, ex=SUMMARY_LOCK_TTL)
+        if not locked:
+            return
+        key = conversation_key(call_sid)
+        meta_key = conversation_meta_key(call_sid)
+        summary, summarized = await redis_client.hmget(meta_key, "summary", "summarized")
+        summarized = int(summarized or 0)
+        total = await redis_client.llen(key)
+        if total - summarized <= MAX_CONTEXT_EXCHANGES:
+            return
+        upto = total - CONTEXT_EXCHANGES
+        
+        lines = [f"Summary so far: {summary}"] if summary else []
+        for raw_exchange in await redis_client.lrange(key, summarized, upto - 1):
+            exchange = orjson.loads(raw_exchange)
+            lines.append(f"User: {exchange['user']}")
+            lines.append(f"AI: {exchange['ai']}")
+        
+        completion = await oai.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": "\n".join(lines)}
+            ],
+            max_tokens=200,
+            temperature=0.3
+        )
+        
+        # Drop the summarized turns from the prompt history, keeping any that arrived meanwhile.
+        # WATCH retries the trim if a turn is appended between counting and trimming.
+        async with redis_client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key)
+                    keep_messages = 2 * (await pipe.llen(key) - upto)
+                    pipe.multi()
+                    pipe.hset(meta_key, mapping={
+                        "summary": completion.choices[0].message.content,
+                        "summarized": upto
+                    })
+                    pipe.ltrim(conversation_messages_key(call_sid), -keep_messages, -1)
+                    await pipe.execute()
+                    break
+                except WatchError:
+                    continue
+        tlogging.info("Summarized %s exchanges for %s", upto, call_sid)
+    except Exception as e:
+        tlogging.error("Error summarizing conversation for %s: %s", call_sid, e)
+    finally:
+        if locked:
+            await redis_client.delete(lock_key)
+
+async def store_final_conversation(call_sid: str, audio_url: str = None):
     """Store complete conversation to GCS when call ends"""
     try:
-        if call_sid not in conversations:
-            tlogging.warning(f"No conversation data found for {call_sid}")
+        # A caller who hangs up mid-reply would otherwise lose the last exchange,
+        # and its late write would re-create the keys deleted below
+        deadline = time.monotonic() + REPLY_IN_FLIGHT_TTL
+        while await redis_client.exists(reply_in_flight_key(call_sid)) and time.monotonic() < deadline:
+            await asyncio.sleep(0.25)
+        
+        # Twilio has played every segment by now, so the reply audio can go
+        await delete_tts_audio(call_sid)
+        
+        key = conversation_key(call_sid)
+        meta_key = conversation_meta_key(call_sid)
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.lrange(key, 0, -1)
+            pipe.hget(meta_key, "start_time")
+            raw_exchanges, start_time = await pipe.execute()
+        
+        if not raw_exchanges:
+            tlogging.warning("No conversation data found for %s", call_sid)
             return None
             
-        conversation_data = conversations[call_sid]
-        conversation_data["end_time"] = datetime.utcnow().isoformat()
-        conversation_data["audio_url"] = audio_url
-        conversation_data["status"] = "completed"
+        conversation_data = {
+            "call_sid": call_sid,
+            "start_time": iso_timestamp(start_time),
+            "exchanges": [orjson.loads(exchange) for exchange in raw_exchanges],
+            "end_time": iso_timestamp(time.time()),
+            "audio_url": audio_url,
+            "status": "completed"
+        }
         
         # Create full transcript
         full_transcript = []
         for exchange in conversation_data.get("exchanges", []):
+            exchange["timestamp"] = iso_timestamp(exchange.get("timestamp"))
             full_transcript.append(f"User: {exchange['user']}")
             full_transcript.append(f"AI: {exchange['ai']}")
         
         conversation_data["full_transcript"] = "\n".join(full_transcript)
         
-        # Save single final file
-        blob = bucket.blob(f"conversations/{call_sid}.json")
-        blob.upload_from_string(
-            json.dumps(conversation_data, indent=2),
-            content_type="application/json"
+        # Save single final file, gzipped - transcripts are repetitive and compress several times over.
+        # With Content-Encoding set, GCS hands readers plain JSON transparently.
+        await upload_to_gcs(
+            f"conversations/{call_sid}.json.gz",
+            gzip.compress(orjson.dumps(conversation_data), compresslevel=1),
+            content_type="application/json",
+            content_encoding="gzip"
         )
         
-        tlogging.info(f"✅ Stored final conversation for {call_sid} - {len(conversation_data.get('exchanges', []))} exchanges")
+        tlogging.info("✅ Stored final conversation for %s - %s exchanges", call_sid, len(conversation_data.get('exchanges', [])))
         
-        # Clean up memory
-        del conversations[call_sid]
+        # Clean up Redis
+        await redis_client.delete(key, meta_key, conversation_messages_key(call_sid))
         return conversation_data
         
     except Exception as e:
-        tlogging.error(f"Error in store_final_conversation: {e}")
+        tlogging.error("Error in store_final_conversation: %s", e)
         return None
 
-def store_conversation_data(call_sid: str, transcript: str, ai_response: str, audio_url: str = None):
+async def store_conversation_data(call_sid: str, transcript: str, ai_response: str, audio_url: str = None):
     """Legacy function for backward compatibility"""
-    add_to_conversation(call_sid, transcript, ai_response)
+    await add_to_conversation(call_sid, transcript, ai_response)
+
+def sign_url(blob: storage.Blob) -> str:
+    """Create a V4 signed GET URL, refreshing the access token used for IAM signing"""
+    if not signing_credentials.valid:
+        signing_credentials.refresh(AuthRequest())
+    return blob.generate_signed_url(
+        version="v4",
+        expiration=TTS_URL_EXPIRY,
+        method="GET",
+        service_account_email=signing_credentials.service_account_email,
+        access_token=signing_credentials.token
+    )
+
+async def synthesize_segment(call_sid: str, segment_id: str, text: str) -> Optional[str]:
+    """Synthesize one reply sentence, store it in GCS and return a signed URL for <Play>"""
+    try:
+        speech = await oai_realtime.audio.speech.create(
+            model=TTS_MODEL,
+            voice=TTS_VOICE,
+            input=text,
+            response_format="wav"
+        )
+        blob = await upload_to_gcs(f"tts/{call_sid}/{segment_id}.wav", speech.content, content_type="audio/wav")
+        return await asyncio.to_thread(sign_url, blob)
+    except Exception as e:
+        tlogging.error("TTS error for %s segment %s: %s", call_sid, segment_id, e)
+        return None
+
+async def delete_tts_audio(call_sid: str):
+    """Remove a call's synthesized reply audio from GCS once the call is over"""
+    def delete():
+        blobs = list(bucket.list_blobs(prefix=f"tts/{call_sid}/"))
+        if blobs:
+            bucket.delete_blobs(blobs)
+        return len(blobs)
+    try:
+        deleted = await asyncio.to_thread(delete)
+        tlogging.info("Deleted %s TTS segments for %s", deleted, call_sid)
+    except Exception as e:
+        tlogging.error("Error deleting TTS audio for %s: %s", call_sid, e)
+
+async def push_segment(key: str, segment: Optional[dict]):
+    """Publish a ready reply segment (None marks the end of the reply)"""
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.rpush(key, orjson.dumps(segment))
+        pipe.expire(key, SEGMENT_TTL)
+        await pipe.execute()
+
+async def build_messages(call_sid: str, user_text: str) -> list:
+    """Assemble the GPT prompt: system prompt, running summary, recent turns and the new utterance"""
+    messages = [{"role": "system", "content": AGENT_SYSTEM_PROMPT}]
+    summary, history = await get_context(call_sid)
+    if summary:
+        messages.append({"role": "system", "content": f"Earlier in this call: {summary}"})
+    
+    # Add recent turns if they exist
+    messages.extend(history)
+    
+    # Add current user input
+    messages.append({"role": "user", "content": user_text})
+    return messages
+
+async def stream_reply(messages: list):
+    """Yield the GPT reply text as it streams in"""
+    stream = await oai_realtime.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=messages,
+        max_tokens=150,
+        temperature=0.7,
+        stream=True
+    )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+def normalize_speech(text: str) -> str:
+    """Lowercase and drop punctuation so partial and final transcripts compare equal"""
+    return " ".join(re.sub(r"[^\w\s']", " ", text.lower()).split())
+
+async def speculate(call_sid: str, partial: str, deltas: asyncio.Queue):
+    """Start the reply from a partial transcript, buffering its text until the final result arrives"""
+    try:
+        async for delta in stream_reply(await build_messages(call_sid, partial)):
+            deltas.put_nowait(delta)
+        deltas.put_nowait(None)
+    except Exception as e:
+        deltas.put_nowait(e)
+
+async def replay_speculation(deltas: asyncio.Queue):
+    """Yield a speculative reply's buffered text, then the rest as it keeps streaming"""
+    while (delta := await deltas.get()) is not None:
+        if isinstance(delta, Exception):
+            raise delta
+        yield delta
+
+def discard_speculation(call_sid: str):
+    """Cancel any speculative reply still running for this call"""
+    speculation = speculations.pop(call_sid, None)
+    if speculation is not None:
+        speculation["task"].cancel()
+        if speculation["timer"] is not None:
+            speculation["timer"].cancel()
+
+def start_speculation(call_sid: str, partial: str, normalized: str):
+    """Replace the call's speculative reply with one started from the latest partial transcript"""
+    discard_speculation(call_sid)
+    deltas = asyncio.Queue()
+    speculations[call_sid] = {
+        "text": normalized,
+        "deltas": deltas,
+        "task": spawn(speculate(call_sid, partial, deltas)),
+        "started": time.monotonic(),
+        "pending": None,
+        "timer": None
+    }
+
+def defer_speculation(call_sid: str, partial: str, normalized: str):
+    """Restart from a grown transcript, holding it until the debounce window since the last start closes"""
+    speculation = speculations[call_sid]
+    delay = speculation["started"] + SPECULATION_DEBOUNCE_SECONDS - time.monotonic()
+    if delay <= 0:
+        start_speculation(call_sid, partial, normalized)
+        return
+    # Keep only the newest transcript - the caller's last words rarely get another partial
+    speculation["pending"] = (partial, normalized)
+    if speculation["timer"] is None:
+        speculation["timer"] = asyncio.get_running_loop().call_later(delay, flush_speculation, call_sid)
+
+def flush_speculation(call_sid: str):
+    """Debounce timer: restart from the newest partial held back during the window"""
+    speculation = speculations.get(call_sid)
+    if speculation is not None:
+        speculation["timer"] = None
+        if speculation["pending"] is not None:
+            start_speculation(call_sid, *speculation["pending"])
+
+def expire_speculations():
+    """Cancel speculative replies left behind by calls that ended on another worker"""
+    cutoff = time.monotonic() - SPECULATION_TTL_SECONDS
+    for call_sid in [sid for sid, speculation in speculations.items() if speculation["started"] < cutoff]:
+        discard_speculation(call_sid)
+
+def take_speculation(call_sid: str, speech_result: str) -> Optional[asyncio.Queue]:
+    """Claim the speculative reply if it was started from exactly what the caller ended up saying"""
+    expire_speculations()
+    speculation = speculations.get(call_sid)
+    if speculation is not None and speculation["text"] == normalize_speech(speech_result):
+        del speculations[call_sid]
+        tlogging.info("Using speculative reply for %s", call_sid)
+        return speculation["deltas"]
+    discard_speculation(call_sid)
+    return None
+
+async def run_reply_pipeline(call_sid: str, reply_id: str, speech_result: str, reply_stream):
+    """
+    Streams the GPT reply and synthesizes it sentence by sentence.
+    Segments are published in order as soon as their audio is ready, so the caller
+    hears the first sentence while the rest is still being generated.
+    """
+    key = segments_key(call_sid, reply_id)
+    pending = asyncio.Queue()
+
+    async def publish():
+        # Hand segments to the consumer in order, waiting for each TTS task in turn
+        while (item := await pending.get()) is not None:
+            text, tts_task = item
+            await push_segment(key, {"text": text, "url": await tts_task})
+
+    publisher = asyncio.create_task(publish())
+    seq = 0
+
+    def queue_segment(text: str):
+        nonlocal seq
+        text = text.strip()
+        if text:
+            pending.put_nowait((text, asyncio.create_task(synthesize_segment(call_sid, f"{reply_id}-{seq}", text))))
+            seq += 1
+
+    ai_response = ""
+    buffer = ""
+    try:
+        try:
+            async for delta in reply_stream:
+                ai_response += delta
+                buffer += delta
+                *sentences, buffer = SENTENCE_END.split(buffer)
+                for sentence in sentences:
+                    queue_segment(sentence)
+                if seq == 0 and len(buffer) >= FIRST_SEGMENT_MIN_CHARS:
+                    # First clause break past the minimum, so the opening segment is short but not clipped
+                    cut = CLAUSE_END.search(buffer, FIRST_SEGMENT_MIN_CHARS)
+                    if cut:
+                        queue_segment(buffer[:cut.start()])
+                        buffer = buffer[cut.end():]
+            tlogging.info("AI response: %.100s...", ai_response)
+        except Exception as e:
+            tlogging.error("OpenAI error: %s", e)
+            if not ai_response:
+                ai_response = buffer = "I'm having trouble processing that right now. Could you try asking something else?"
+        queue_segment(buffer)
+
+        # Store conversation exchange
+        try:
+            total = await add_to_conversation(call_sid, speech_result, ai_response)
+            if total > MAX_CONTEXT_EXCHANGES:
+                spawn(summarize_older_exchanges(call_sid))
+        except Exception as e:
+            tlogging.error("Storage error: %s", e)
+        await redis_client.delete(reply_in_flight_key(call_sid))
+    finally:
+        pending.put_nowait(None)
+        await publisher
+        await push_segment(key, None)
+
+def say_and_hang_up(message: str) -> str:
+    """TwiML that speaks a fixed message and ends the call"""
+    twiml = VoiceResponse()
+    twiml.say(message, voice="Polly.Joanna", language="en-US")
+    twiml.hangup()
+    return str(twiml)
+
+def _build_greeting() -> VoiceResponse:
+    """Greeting played when a call first connects"""
+    twiml = VoiceResponse()
+    
+    # For call recording, we'll store conversation data as we go
+    # Full call recording can be enabled in Twilio Console
+    
+    # Start conversation with greeting
+    twiml.say(
+        "Hi, How can I help you today?",
+        voice="Polly.Joanna", 
+        language="en-US"
+    )
+    
+    # Gather user input for conversation
+    twiml.gather(
+        num_digits=0,  # No digit collection, just speech
+        speech_timeout="auto",
+        speech_model="experimental_conversations",
+        action=f"{BASE_URL}/twilio/conversation",
+        method="POST",
+        input="speech",
+        partial_result_callback=f"{BASE_URL}/twilio/partial",
+        partial_result_callback_method="POST"
+    )
+    
+    # If no speech detected, give prompt
+    twiml.say(
+        "I'm listening. Please speak your question or request.",
+        voice="Polly.Joanna",
+        language="en-US"
+    )
+    return twiml
+
+def _build_listen() -> VoiceResponse:
+    """Wait for the caller's next utterance, hanging up only if they stay silent"""
+    twiml = VoiceResponse()
+    
+    # Wait for next user input - NO HANGUP CODE HERE!
+    twiml.gather(
+        num_digits=0,
+        speech_timeout="auto",
+        speech_model="experimental_conversations",
+        action=f"{BASE_URL}/twilio/conversation",
+        method="POST",
+        input="speech",
+        timeout=15,
+        partial_result_callback=f"{BASE_URL}/twilio/partial",
+        partial_result_callback_method="POST"
+    )
+    
+    # Fallback if no response for 15 seconds - ONLY THEN end
+    twiml.say("Thanks for calling! Have a great day!", voice="Polly.Joanna", language="en-US")
+    twiml.hangup()
+    return twiml
+
+def twiml_verbs(twiml: VoiceResponse) -> str:
+    """The verbs inside a <Response>, for splicing into hand-built TwiML"""
+    xml = twiml.to_xml(xml_declaration=False)
+    if not (xml.startswith("<Response>") and xml.endswith("</Response>")):
+        raise RuntimeError(f"Unexpected TwiML framing: {xml[:40]}...")
+    return xml[len("<Response>"):-len("</Response>")]
+
+# Fixed TwiML responses are serialized once at startup instead of on every request
+TWIML_OPEN = '<?xml version="1.0" encoding="UTF-8"?><Response>'
+TWIML_CLOSE = "</Response>"
+GREETING_TWIML = str(_build_greeting())
+LISTEN_VERBS = twiml_verbs(_build_listen())
+GOODBYE_TWIML = say_and_hang_up("Great! Thanks for calling. Have a wonderful day!")
+TIMEOUT_TWIML = say_and_hang_up("I didn't hear anything. Thanks for calling, have a great day!")
+CONVERSATION_ERROR_TWIML = say_and_hang_up("I apologize for the technical difficulty. Please try calling again.")
+RECORDING_PARSE_ERROR_TWIML = say_and_hang_up("Sorry, I couldn't process the recording. Please try again.")
+RECORDING_PARAMS_ERROR_TWIML = say_and_hang_up("Sorry, there was an issue with the recording. Please try again.")
+RECORDING_ERROR_TWIML = say_and_hang_up("Sorry, I couldn't process your message. Goodbye.")
+
+async def end_call(call_sid: str, background: BackgroundTasks, twiml: str, reason: str) -> Response:
+    """Hang up with the given TwiML and store the conversation once the response has been sent"""
+    discard_speculation(call_sid)
+    if await redis_client.exists(conversation_key(call_sid)):
+        background.add_task(store_final_conversation, call_sid)
+        tlogging.info("Storing conversation after %s", reason)
+    return Response(content=twiml, media_type="application/xml")
+
+async def next_segment_twiml(call_sid: str, reply_id: str) -> str:
+    """
+    Plays every reply segment that is ready for this call.
+    Redirects back for more while the reply is still streaming, then gathers the next utterance.
+    """
+    key = segments_key(call_sid, reply_id)
+    finished = False
+    verbs = []
+
+    # Block until the next segment is ready, then take whatever else has arrived too
+    first = await redis_client.blpop(key, timeout=SEGMENT_WAIT_SECONDS)
+    if first is None:
+        tlogging.error("Timed out waiting for reply segment for %s", call_sid)
+        raw_segments = ["null"]
+    else:
+        raw_segments = [first[1]] + (await redis_client.lpop(key, 100) or [])
+
+    for raw_segment in raw_segments:
+        segment = orjson.loads(raw_segment)
+        if segment is None:
+            finished = True
+            break
+        if segment["url"]:
+            verbs.append(f"<Play>{escape(segment['url'])}</Play>")
+        else:
+            # TTS failed for this sentence - let Twilio speak it instead
+            verbs.append(f'<Say language="en-US" voice="Polly.Joanna">{escape(segment["text"])}</Say>')
+
+    # Build the XML directly - only the segment verbs change between responses
+    if finished:
+        await redis_client.delete(key)
+        verbs.append(LISTEN_VERBS)
+    else:
+        next_url = f"{BASE_URL}/twilio/conversation/next?reply_id={reply_id}"
+        verbs.append(f'<Redirect method="POST">{escape(next_url)}</Redirect>')
+
+    return TWIML_OPEN + "".join(verbs) + TWIML_CLOSE
+
+async def extract_fields(request: Request, keys: set) -> Dict[str, str]:
+    """
+    Pull only the wanted fields out of a URL-encoded Twilio webhook body.
+    Parses the body stream incrementally and stops once every key is found,
+    instead of materializing the whole form.
+    """
+    fields = {}
+    pending = b""
+
+    def collect(pairs: bytes):
+        for name, value in parse_qsl(pairs.decode("utf-8"), keep_blank_values=True):
+            if name in keys:
+                fields[name] = value
+
+    async for chunk in request.stream():
+        pending += chunk
+        # Only parse complete name=value pairs; keep the trailing partial pair for the next chunk
+        complete, sep, pending = pending.rpartition(b"&")
+        if sep:
+            collect(complete)
+            if len(fields) == len(keys):
+                return fields
+    collect(pending)
+    return fields
+
+@app.on_event("startup")
+async def open_http_session():
+    """Share one pooled HTTP session so Twilio fetches reuse keep-alive TLS connections"""
+    app.state.http = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=100, keepalive_timeout=60)
+    )
+
+@app.on_event("shutdown")
+async def close_clients():
+    """Close pooled connections on shutdown"""
+    await app.state.http.close()
+    await oai.close()
+    await redis_client.aclose()
 
 @app.get("/")
 async def health_check():
@@ -127,7 +728,7 @@ async def health_check():
 async def list_conversations():
     """List recent conversations from GCS"""
     try:
-        blobs = list(bucket.list_blobs(prefix="conversations/", max_results=10))
+        blobs = await asyncio.to_thread(lambda: list(bucket.list_blobs(prefix="conversations/", max_results=10)))
         conversations = []
         for blob in blobs:
             conversations.append({
@@ -141,11 +742,20 @@ async def list_conversations():
 
 @app.get("/active_calls")
 async def active_calls():
-    """Check active calls in memory"""
+    """Check active calls in Redis"""
+    call_ids = [
+        key.split(":", 1)[1]
+        async for key in redis_client.scan_iter(match="conv:*")
+        if key.count(":") == 1
+    ]
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for call_id in call_ids:
+            pipe.llen(conversation_key(call_id))
+        counts = await pipe.execute()
     return {
-        "active_calls": list(conversations.keys()),
-        "count": len(conversations),
-        "details": {call_id: len(conv["exchanges"]) for call_id, conv in conversations.items()}
+        "active_calls": call_ids,
+        "count": len(call_ids),
+        "details": dict(zip(call_ids, counts))
     }
 
 @app.post("/test")
@@ -153,15 +763,15 @@ async def active_calls():
 async def test_endpoint(request: Request):
     """Test endpoint to verify Twilio connectivity"""
     tlogging.info("Test endpoint called")
-    tlogging.info(f"Method: {request.method}")
-    tlogging.info(f"Headers: {dict(request.headers)}")
+    tlogging.info("Method: %s", request.method)
+    tlogging.info("Headers: %s", dict(request.headers))
     
     if request.method == "POST":
         try:
             form = await request.form()
-            tlogging.info(f"Form data: {dict(form)}")
+            tlogging.info("Form data: %s", dict(form))
         except Exception as e:
-            tlogging.error(f"Error reading form: {e}")
+            tlogging.error("Error reading form: %s", e)
     
     return {"status": "test successful", "method": request.method}
 
@@ -170,50 +780,10 @@ async def incoming_call(request: Request):
     """
     Initial handler: starts a conversation flow.
     """
-    try:
-        tlogging.info("Processing incoming call webhook")
-        twiml = VoiceResponse()
-        
-        # For call recording, we'll store conversation data as we go
-        # Full call recording can be enabled in Twilio Console
-        
-        # Start conversation with greeting
-        twiml.say(
-            "Hi, How can I help you today?",
-            voice="Polly.Joanna", 
-            language="en-US"
-        )
-        
-        # Gather user input for conversation
-        gather = twiml.gather(
-            num_digits=0,  # No digit collection, just speech
-            speech_timeout="auto",
-            speech_model="experimental_conversations",
-            action=f"{BASE_URL}/twilio/conversation",
-            method="POST",
-            input="speech"
-        )
-        
-        # If no speech detected, give prompt
-        twiml.say(
-            "I'm listening. Please speak your question or request.",
-            voice="Polly.Joanna",
-            language="en-US"
-        )
-        
-        twiml_str = str(twiml)
-        tlogging.info(f"Initial TwiML response: {twiml_str}")
-        return Response(content=twiml_str, media_type="application/xml")
-
-    except Exception:
-        tlogging.exception("Error in incoming_call")
-        fallback = VoiceResponse()
-        fallback.say("Sorry, an error occurred. Goodbye.", voice="Polly.Joanna", language="en-US")
-        fallback.hangup()
-        return Response(content=str(fallback), media_type="application/xml")
+    return Response(content=GREETING_TWIML, media_type="application/xml")
 
 @app.post("/twilio/conversation") 
-async def conversation_handler(request: Request):
+async def conversation_handler(request: Request, background: BackgroundTasks):
     """
     Handles ongoing conversation with real-time speech processing.
     """
@@ -222,110 +792,123 @@ async def conversation_handler(request: Request):
         form_data = {}
         
         try:
-            form = await request.form()
-            form_data = dict(form)
-            tlogging.info(f"Conversation form data: {list(form_data.keys())}")
+            form_data = await extract_fields(request, {"CallSid", "SpeechResult"})
+            if tlogging.isEnabledFor(logging.INFO):
+                tlogging.info("Conversation form data: %s", list(form_data))
         except Exception as e:
-            tlogging.error(f"Error parsing conversation data: {e}")
+            tlogging.error("Error parsing conversation data: %s", e)
         
         # Get speech result from Twilio's speech recognition
         speech_result = form_data.get("SpeechResult", "")
         call_sid = form_data.get("CallSid", "")
         
-        tlogging.info(f"User said: {speech_result}")
+        # No speech detected - end call after timeout before doing any other work
+        if not speech_result:
+            return await end_call(call_sid, background, TIMEOUT_TWIML, "timeout")
         
-        # Check if user wants to end call
-        if speech_result and speech_result.lower().strip() in ["no", "nope", "nothing", "bye", "goodbye", "that's all", "no thanks"]:
-            twiml = VoiceResponse()
-            twiml.say("Great! Thanks for calling. Have a wonderful day!", voice="Polly.Joanna", language="en-US")
-            
-            # Store final conversation
-            try:
-                store_final_conversation(call_sid)
-                tlogging.info(f"Stored conversation after user said: {speech_result}")
-            except Exception as e:
-                tlogging.error(f"Error storing final conversation: {e}")
-                
-            twiml.hangup()
-            return Response(content=str(twiml), media_type="application/xml")
+        tlogging.info("User said: %s", speech_result)
         
-        if not speech_result:
-            # No speech detected - end call after timeout
-            twiml = VoiceResponse()
-            twiml.say("I didn't hear anything. Thanks for calling, have a great day!", voice="Polly.Joanna", language="en-US")
-            
-            # Store final conversation
-            try:
-                store_final_conversation(call_sid)
-                tlogging.info(f"Stored conversation after timeout")
-            except Exception as e:
-                tlogging.error(f"Error storing final conversation: {e}")
-                
-            twiml.hangup()
-            return Response(content=str(twiml), media_type="application/xml")
-        
-        # Generate AI response with conversation context
-        try:
-            # Build conversation history for context
-            messages = [{"role": "system", "content": AGENT_SYSTEM_PROMPT}]
-            
-            # Add previous exchanges if they exist
-            if call_sid in conversations:
-                for exchange in conversations[call_sid]["exchanges"]:
-                    messages.append({"role": "user", "content": exchange["user"]})
-                    messages.append({"role": "assistant", "content": exchange["ai"]})
-            
-            # Add current user input
-            messages.append({"role": "user", "content": speech_result})
-            
-            chat_completion = oai.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=messages,
-                max_tokens=150,
-                temperature=0.7
-            )
-            ai_response = chat_completion.choices[0].message.content
-            tlogging.info(f"AI response: {ai_response[:100]}...")
-        except Exception as e:
-            tlogging.error(f"OpenAI error: {e}")
-            ai_response = "I'm having trouble processing that right now. Could you try asking something else?"
+        # Check if user wants to end call
+        # Twilio punctuates transcripts ("Bye."), so strip that before matching
+        if speech_result.lower().strip(" .,!?") in END_PHRASES:
+            return await end_call(call_sid, background, GOODBYE_TWIML, f"user said: {speech_result}")
         
-        # Store conversation exchange
-        try:
-            add_to_conversation(call_sid, speech_result, ai_response)
-        except Exception as e:
-            tlogging.error(f"Storage error: {e}")
-        
-        # Continue conversation - KEEP IT ALIVE!
-        twiml = VoiceResponse()
-        twiml.say(ai_response, voice="Polly.Joanna", language="en-US")
-        
-        # Wait for next user input - NO HANGUP CODE HERE!
-        twiml.gather(
-            num_digits=0,
-            speech_timeout="auto",
-            speech_model="experimental_conversations", 
-            action=f"{BASE_URL}/twilio/conversation",
-            method="POST",
-            input="speech",
-            timeout=15
-        )
+        # Reuse the reply speculatively started from partial results, or start one cold
+        speculative = take_speculation(call_sid, speech_result)
+        if speculative is not None:
+            reply_stream = replay_speculation(speculative)
+        else:
+            reply_stream = stream_reply(await build_messages(call_sid, speech_result))
         
-        # Fallback if no response for 15 seconds - ONLY THEN end
-        twiml.say("Thanks for calling! Have a great day!", voice="Polly.Joanna", language="en-US")
-        twiml.hangup()
+        # Stream the reply in the background and play the first sentence as soon as it's ready
+        reply_id = uuid.uuid4().hex[:8]
+        await redis_client.set(reply_in_flight_key(call_sid), reply_id, ex=REPLY_IN_FLIGHT_TTL)
+        spawn(run_reply_pipeline(call_sid, reply_id, speech_result, reply_stream))
         
-        return Response(content=str(twiml), media_type="application/xml")
+        return Response(content=await next_segment_twiml(call_sid, reply_id), media_type="application/xml")
         
     except Exception:
         tlogging.exception("Error in conversation_handler")
-        fallback = VoiceResponse()
-        fallback.say("I apologize for the technical difficulty. Please try calling again.", voice="Polly.Joanna", language="en-US")
-        fallback.hangup()
-        return Response(content=str(fallback), media_type="application/xml")
+        return Response(content=CONVERSATION_ERROR_TWIML, media_type="application/xml")
+
+@app.post("/twilio/partial")
+async def partial_result(request: Request):
+    """
+    Interim speech results: speculatively start the GPT reply while the caller is still talking.
+    """
+    try:
+        form_data = await extract_fields(request, {"CallSid", "UnstableSpeechResult"})
+        call_sid = form_data.get("CallSid", "")
+        partial = form_data.get("UnstableSpeechResult", "")
+        normalized = normalize_speech(partial)
+        
+        expire_speculations()
+        
+        current = speculations.get(call_sid)
+        words = normalized.split()
+        if call_sid and len(words) >= SPECULATION_MIN_WORDS:
+            # Compare whole words - "go" must not count as the start of "gold"
+            current_words = current["text"].split() if current is not None else []
+            if current is None or words[:len(current_words)] != current_words:
+                # First partial, or Twilio revised earlier words so the running reply can never match
+                start_speculation(call_sid, partial, normalized)
+            elif len(words) > len(current_words):
+                # The caller kept talking: restart from the longer transcript, debounced
+                defer_speculation(call_sid, partial, normalized)
+            else:
+                # Back to the text already speculated on - nothing newer to restart from
+                current["pending"] = None
+        
+        return Response(status_code=200)
+        
+    except Exception as e:
+        tlogging.error("Error in partial_result: %s", e)
+        return Response(status_code=500)
+
+@app.post("/twilio/conversation/next")
+async def conversation_next(request: Request):
+    """
+    Continues a streamed AI reply with the next synthesized segments.
+    """
+    try:
+        form_data = await extract_fields(request, {"CallSid"})
+        call_sid = form_data.get("CallSid", "")
+        reply_id = request.query_params.get("reply_id", "")
+        return Response(content=await next_segment_twiml(call_sid, reply_id), media_type="application/xml")
+        
+    except Exception:
+        tlogging.exception("Error in conversation_next")
+        return Response(content=CONVERSATION_ERROR_TWIML, media_type="application/xml")
+
+async def transcribe_audio(audio_data: bytes) -> str:
+    """Transcribe a recording using OpenAI Whisper"""
+    try:
+        tlogging.info("Starting audio transcription")
+        tlogging.info("Audio file size: %s bytes", len(audio_data))
+        # Send the bytes straight from memory - no temp file round trip
+        transcript = await oai_transcribe.audio.transcriptions.create(
+            model="whisper-1",
+            file=("audio.wav", audio_data, "audio/wav"),
+            response_format="text"
+        )
+        text = transcript if isinstance(transcript, str) else transcript.text
+        tlogging.info("Transcription completed: %.100s...", text)
+    except Exception as e:
+        tlogging.error("Transcription error: %s", e)
+        tlogging.error("API key prefix: %.15s...", openai_api_key)
+        text = "Hello! I received your voice message. How can I help you today?"
+    return text
+
+async def archive_audio(call_sid: str, audio_data: bytes):
+    """Store a caller's recorded message in GCS"""
+    try:
+        await upload_to_gcs(f"audio/{call_sid}.wav", audio_data, content_type="audio/wav")
+        tlogging.info("Archived audio for %s", call_sid)
+    except Exception as e:
+        tlogging.error("Error archiving audio for %s: %s", call_sid, e)
 
 @app.post("/twilio/recording")
-async def recording_callback(request: Request):
+async def recording_callback(request: Request, background: BackgroundTasks):
     """
     Recording callback: fetches audio, transcribes, stores, and replies.
     """
@@ -333,96 +916,49 @@ async def recording_callback(request: Request):
         tlogging.info("Processing recording callback")
         
         # Debug request information
-        tlogging.info(f"Request method: {request.method}")
-        tlogging.info(f"Request headers: {dict(request.headers)}")
-        tlogging.info(f"Request URL: {request.url}")
+        if tlogging.isEnabledFor(logging.INFO):
+            tlogging.info("Request method: %s", request.method)
+            tlogging.info("Request headers: %s", dict(request.headers))
+            tlogging.info("Request URL: %s", request.url)
         
         # Check content type and try to parse the form data
         content_type = request.headers.get("content-type", "")
-        tlogging.info(f"Content-Type: {content_type}")
+        tlogging.info("Content-Type: %s", content_type)
         
         form_data = {}
         try:
-            if "application/x-www-form-urlencoded" in content_type:
-                form = await request.form()
-                form_data = dict(form)
-                tlogging.info(f"Form data keys: {list(form_data.keys())}")
-                # Log first few form values for debugging
-                for key in list(form_data.keys())[:5]:  # Only log first 5 keys
-                    value = str(form_data.get(key))[:100] if form_data.get(key) else None  # Truncate long values
-                    tlogging.info(f"Form data - {key}: {value}")
-            else:
-                # Try to read as JSON or text
-                body = await request.body()
-                tlogging.info(f"Request body (first 500 chars): {body.decode('utf-8')[:500]}")
-                # Try to parse as URL-encoded manually
-                if body:
-                    from urllib.parse import parse_qs
-                    parsed = parse_qs(body.decode('utf-8'))
-                    form_data = {k: v[0] if v else None for k, v in parsed.items()}
-                    tlogging.info(f"Manually parsed form data: {form_data}")
+            # Twilio posts URL-encoded fields; only pull out the two we need
+            form_data = await extract_fields(request, {"CallSid", "RecordingUrl"})
+            tlogging.info("Form data: %s", form_data)
         except Exception as e:
-            tlogging.error(f"Error parsing request data: {e}")
+            tlogging.error("Error parsing request data: %s", e)
             # Return a proper TwiML response instead of raising an error
-            fallback = VoiceResponse()
-            fallback.say("Sorry, I couldn't process the recording. Please try again.", voice="Polly.Joanna", language="en-US")
-            fallback.hangup()
-            return Response(content=str(fallback), media_type="application/xml")
+            return Response(content=RECORDING_PARSE_ERROR_TWIML, media_type="application/xml")
         
         call_sid = form_data.get("CallSid")
         recording_url = form_data.get("RecordingUrl")
         
-        tlogging.info(f"Received callback - CallSid: {call_sid}, RecordingUrl: {recording_url}")
+        tlogging.info("Received callback - CallSid: %s, RecordingUrl: %s", call_sid, recording_url)
         
         if not call_sid or not recording_url:
-            tlogging.error(f"Missing required parameters - CallSid: {call_sid}, RecordingUrl: {recording_url}")
+            tlogging.error("Missing required parameters - CallSid: %s, RecordingUrl: %s", call_sid, recording_url)
             # Return a proper TwiML response instead of raising an error
-            fallback = VoiceResponse()
-            fallback.say("Sorry, there was an issue with the recording. Please try again.", voice="Polly.Joanna", language="en-US")
-            fallback.hangup()
-            return Response(content=str(fallback), media_type="application/xml")
+            return Response(content=RECORDING_PARAMS_ERROR_TWIML, media_type="application/xml")
 
         # Fetch audio with Basic Auth
         auth = aiohttp.BasicAuth(login=TWILIO_ACCOUNT_SID, password=TWILIO_AUTH_TOKEN)
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{recording_url}.wav", auth=auth) as resp:
-                resp.raise_for_status()
-                audio_data = await resp.read()
-
-        # Save audio to GCS
-        blob_audio = bucket.blob(f"audio/{call_sid}.wav")
-        blob_audio.upload_from_string(audio_data, content_type="audio/wav")
+        async with app.state.http.get(f"{recording_url}.wav", auth=auth) as resp:
+            resp.raise_for_status()
+            audio_data = await resp.read()
 
-        # Transcribe audio using OpenAI Whisper
-        import tempfile
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            temp_file.write(audio_data)
-            temp_file_path = temp_file.name
-        
-        try:
-            tlogging.info("Starting audio transcription")
-            with open(temp_file_path, "rb") as audio_file:
-                tlogging.info(f"Audio file size: {os.path.getsize(temp_file_path)} bytes")
-                transcript = oai.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="text"
-                )
-            text = transcript if isinstance(transcript, str) else transcript.text
-            tlogging.info(f"Transcription completed: {text[:100]}...")
-        except Exception as e:
-            tlogging.error(f"Transcription error: {e}")
-            tlogging.error(f"API key prefix: {openai_api_key[:15]}...")
-            text = "Hello! I received your voice message. How can I help you today?"
-        finally:
-            # Clean up temp file
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
+        # Archive audio to GCS after the reply is sent - the caller shouldn't wait on it
+        background.add_task(archive_audio, call_sid, audio_data)
+        text = await transcribe_audio(audio_data)
 
         # Generate AI response using GPT-4o-mini (legacy recording endpoint)
         tlogging.info("Generating AI response")
         try:
-            chat_completion = oai.chat.completions.create(
+            chat_completion = await oai_realtime.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": AGENT_SYSTEM_PROMPT},
@@ -432,89 +968,87 @@ async def recording_callback(request: Request):
                 temperature=0.7
             )
             ai_response = chat_completion.choices[0].message.content
-            tlogging.info(f"AI response generated: {ai_response[:100]}...")
+            tlogging.info("AI response generated: %.100s...", ai_response)
         except Exception as e:
-            tlogging.error(f"OpenAI API error: {e}")
+            tlogging.error("OpenAI API error: %s", e)
             # Fallback response if OpenAI fails
             ai_response = f"I heard you say: {text}. Thank you for your message!"
 
-        # Store conversation data in GCS
-        store_conversation_data(call_sid, text, ai_response)
+        # Store conversation data
+        await store_conversation_data(call_sid, text, ai_response)
 
         # Reply via TwiML
-        tlogging.info(f"Creating TwiML response with message: {ai_response[:50]}...")
+        tlogging.info("Creating TwiML response with message: %.50s...", ai_response)
         response = VoiceResponse()
         response.say(ai_response, voice="Polly.Joanna", language="en-US")
         response.pause(length=1)  # Add a short pause before hanging up
         response.hangup()
         
         twiml_str = str(response)
-        tlogging.info(f"TwiML response: {twiml_str}")
+        tlogging.info("TwiML response: %s", twiml_str)
         return Response(content=twiml_str, media_type="application/xml")
 
     except Exception:
         tlogging.exception("Error in recording_callback")
-        fallback = VoiceResponse()
-        fallback.say("Sorry, I couldn't process your message. Goodbye.", voice="Polly.Joanna", language="en-US")
-        fallback.hangup()
-        return Response(content=str(fallback), media_type="application/xml")
+        return Response(content=RECORDING_ERROR_TWIML, media_type="application/xml")
+
+async def download_and_store_recording(call_sid: str, recording_url: str):
+    """Fetch a finished call recording from Twilio and archive it in GCS"""
+    try:
+        auth = aiohttp.BasicAuth(login=TWILIO_ACCOUNT_SID, password=TWILIO_AUTH_TOKEN)
+        async with app.state.http.get(f"{recording_url}.wav", auth=auth) as response:
+            audio_data = await response.read() if response.status == 200 else None
+        
+        if audio_data:
+            await upload_to_gcs(f"recordings/{call_sid}.wav", audio_data, content_type="audio/wav")
+            tlogging.info("Stored call recording for %s", call_sid)
+            
+    except Exception as e:
+        tlogging.error("Error storing recording: %s", e)
 
 @app.post("/twilio/call_recording_complete")
 async def call_recording_complete(request: Request):
     """Handle call recording completion webhook (if recording enabled in Twilio Console)"""
     try:
-        form_data = await request.form()
+        form_data = await extract_fields(request, {"CallSid", "RecordingUrl"})
         call_sid = form_data.get('CallSid')
         recording_url = form_data.get('RecordingUrl')
         
-        tlogging.info(f"Call recording completed for {call_sid}: {recording_url}")
+        tlogging.info("Call recording completed for %s: %s", call_sid, recording_url)
         
-        # Download and store the recording in GCS if available
+        # Twilio only needs the ack - download and store the recording in the background
         if recording_url and call_sid:
-            try:
-                import requests
-                auth = (TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-                response = requests.get(f"{recording_url}.wav", auth=auth)
-                
-                if response.status_code == 200:
-                    blob = bucket.blob(f"recordings/{call_sid}.wav")
-                    blob.upload_from_string(response.content, content_type="audio/wav")
-                    gcs_audio_url = f"gs://{BUCKET_NAME}/recordings/{call_sid}.wav"
-                    tlogging.info(f"Stored call recording for {call_sid}")
-                    
-            except Exception as e:
-                tlogging.error(f"Error storing recording: {e}")
+            spawn(download_and_store_recording(call_sid, recording_url))
         
         return Response(status_code=200)
         
     except Exception as e:
-        tlogging.error(f"Error in call_recording_complete: {e}")
+        tlogging.error("Error in call_recording_complete: %s", e)
         return Response(status_code=500)
 
 @app.post("/twilio/call_status")
-async def call_status(request: Request):
+async def call_status(request: Request, background: BackgroundTasks):
     """Handle call status webhook for call completion - SAVES COMPLETE CONVERSATION"""
     try:
-        form_data = await request.form()
+        form_data = await extract_fields(request, {"CallSid", "CallStatus"})
         call_sid = form_data.get('CallSid')
         call_status = form_data.get('CallStatus')
         
-        tlogging.info(f"🔥 Call status update: {call_sid} - {call_status}")
+        tlogging.info("🔥 Call status update: %s - %s", call_sid, call_status)
         
         # When call actually ends, save the COMPLETE conversation
         if call_status == 'completed':
-            if call_sid in conversations:
-                conversation_data = store_final_conversation(call_sid)
-                if conversation_data:
-                    exchange_count = len(conversation_data.get('exchanges', []))
-                    tlogging.info(f"✅ SAVED COMPLETE CONVERSATION: {call_sid} with {exchange_count} exchanges")
-                else:
-                    tlogging.error(f"❌ Failed to save conversation for {call_sid}")
+            discard_speculation(call_sid)
+            # A first reply still streaming has not created the conversation yet, but will
+            if await redis_client.exists(conversation_key(call_sid), reply_in_flight_key(call_sid)):
+                # Ack Twilio first; store_final_conversation logs the outcome
+                background.add_task(store_final_conversation, call_sid)
+                tlogging.info("💾 SAVING COMPLETE CONVERSATION: %s", call_sid)
             else:
-                tlogging.warning(f"⚠️ No conversation data found for completed call {call_sid}")
+                tlogging.warning("⚠️ No conversation data found for completed call %s", call_sid)
         
         return Response(status_code=200)
         
     except Exception as e:
-        tlogging.error(f"❌ Error in call_status: {e}")
+        tlogging.error("❌ Error in call_status: %s", e)
         return Response(status_code=500)
\ No newline at end of file